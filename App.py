@@ -2,15 +2,27 @@ from flask import Flask, render_template, request, redirect, url_for, jsonify, m
 import csv
 import os
 import json
+import secrets
 import smtplib
+import sqlite3
+import threading
+import time
 import urllib.parse
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
+from functools import wraps
 from dotenv import load_dotenv
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import check_password_hash, generate_password_hash
 
+try:
+    import fcntl
+except ImportError:  # Windows: the store lock then only covers threads of one process
+    fcntl = None
+
 # 1. Load Environment Variables
 load_dotenv()
 
@@ -31,8 +43,14 @@ ADMIN_TOKEN_TTL_DAYS = 7
 ADMIN_TOKEN_SALT = "admin-auth-token"
 ADMIN_RESET_SALT = "admin-password-reset"
 
-CSV_FILE = 'reservations.csv' # Defined globally for all routes
+CSV_FILE = 'reservations.csv' # Legacy single-file store, migrated into RESERVATIONS_DIR on startup
+RESERVATIONS_DIR = 'reservations' # Active reservations, one CSV per data_pref month
+MANIFEST_FILE = os.path.join(RESERVATIONS_DIR, 'manifest.json')
+STORE_LOCK_FILE = os.path.join(RESERVATIONS_DIR, '.lock')
+UNDATED_PARTITION = 'undated'
 ARCHIVE_FILE = 'reservations_archive.csv'
+JOURNAL_FILE = 'reservations_journal.jsonl' # Append-only log of changes since the last snapshot
+JOURNAL_SNAPSHOT_EVERY = int(os.getenv("JOURNAL_SNAPSHOT_EVERY", "200"))
 SERVICES_FILE = 'services.json'
 FIELDNAMES = [
     "id",
@@ -52,20 +70,36 @@ FIELDNAMES = [
 ARCHIVE_FIELDNAMES = FIELDNAMES + ["archived_at", "archive_reason"]
 WORKING_HOURS = [f"{h:02d}:{m:02d}" for h in range(8, 18) for m in (0, 30)]
 
-# 3. Ensure CSV exists with headers
+# Rate limiting: "memory" for a single worker, "sqlite" to share buckets between workers
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", "rate_limits.sqlite3")
+# (tokens per second, burst) for each endpoint, per client IP and across all clients
+RATE_LIMITS = {
+    "get_slots": {"ip": (1.0, 20), "global": (20.0, 100)},
+    "submit_reservation": {"ip": (1 / 60, 5), "global": (1.0, 20)},
+}
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "4"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "8"))
+ADMISSION_TIMEOUT = float(os.getenv("ADMISSION_TIMEOUT", "2"))
+# Number of reverse proxies in front of the app; their X-Forwarded-For gives the client IP
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "0"))
+if TRUSTED_PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT, x_proto=TRUSTED_PROXY_COUNT)
+RATE_LIMIT_SWEEP_INTERVAL = 60 # Seconds between evictions of refilled buckets
+
+# 3. Ensure storage exists
 def init_db():
-    if not os.path.exists(CSV_FILE):
-        with open(CSV_FILE, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-            writer.writeheader()
-        print(f"Created new database file: {CSV_FILE}")
+    if not os.path.exists(RESERVATIONS_DIR):
+        os.makedirs(RESERVATIONS_DIR)
+        print(f"Created new database directory: {RESERVATIONS_DIR}")
     if not os.path.exists(ARCHIVE_FILE):
         with open(ARCHIVE_FILE, 'w', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=ARCHIVE_FIELDNAMES)
             writer.writeheader()
         print(f"Created new archive file: {ARCHIVE_FILE}")
-
-init_db()
+    migrate_legacy_store()
+    recover_reservations()
+    sweep_past_months()
 
 def load_services():
     if not os.path.exists(SERVICES_FILE):
@@ -214,6 +248,20 @@ def admin_login_required():
         return jsonify({"error": "Unauthorized"}), 403
     return redirect(url_for("admin_login"))
 
+def new_reservation_id():
+    # Microseconds plus a random suffix keep ids unique across requests and workers
+    return datetime.now().strftime("%Y%m%d%H%M%S%f") + secrets.token_hex(2)
+
+def admin_date_range():
+    """The data_pref range of the admin listing; defaults to the current month onward."""
+    start = request.args.get('from') or datetime.now().strftime("%Y-%m-01")
+    end = request.args.get('to') or None
+    return start, end
+
+def admin_range_args():
+    """The from/to query args to carry through admin links and redirects."""
+    return {key: request.args[key] for key in ('from', 'to') if request.args.get(key)}
+
 def parse_timestamp(timestamp_str):
     if not timestamp_str:
         return None
@@ -266,20 +314,305 @@ def archive_old_reservations(rows):
 
     return remaining, archived
 
-def load_reservations():
-    if not os.path.exists(CSV_FILE):
+# --- RESERVATION STORE ---
+# Active reservations are partitioned by data_pref month into
+# RESERVATIONS_DIR/<YYYY-MM>.csv, listed in MANIFEST_FILE. Changes are appended
+# to JOURNAL_FILE (tagged with their month) and replayed on read; compaction
+# rewrites only the partitions the journal touched. Every insert carries a
+# fresh id from new_reservation_id(), so a replayed insert can only match the
+# row it created itself; that makes replay idempotent, and a crash between
+# rewriting a partition and truncating the journal only replays changes
+# already applied.
+
+_store_lock = threading.RLock()
+_store_lock_depth = 0
+_store_lock_file = None
+
+@contextmanager
+def store_lock():
+    """Serialize store access between threads and, through flock, between worker processes."""
+    global _store_lock_depth, _store_lock_file
+    with _store_lock:
+        if _store_lock_depth == 0 and fcntl:
+            _store_lock_file = open(STORE_LOCK_FILE, 'a')
+            fcntl.flock(_store_lock_file.fileno(), fcntl.LOCK_EX)
+        _store_lock_depth += 1
+        try:
+            yield
+        finally:
+            _store_lock_depth -= 1
+            if _store_lock_depth == 0 and _store_lock_file:
+                fcntl.flock(_store_lock_file.fileno(), fcntl.LOCK_UN)
+                _store_lock_file.close()
+                _store_lock_file = None
+
+def partition_key(date_str):
+    try:
+        return datetime.strptime(date_str or "", "%Y-%m-%d").strftime("%Y-%m")
+    except ValueError:
+        return UNDATED_PARTITION
+
+def partition_in_range(month, start=None, end=None):
+    """Whether a month partition intersects the [start, end] date range (unbounded when None)."""
+    if start is None and end is None:
+        return True
+    if month == UNDATED_PARTITION:
+        return False
+    return (start is None or month >= start[:7]) and (end is None or month <= end[:7])
+
+def partition_file(month):
+    return os.path.join(RESERVATIONS_DIR, f"{month}.csv")
+
+def _fsync_directory(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform (e.g. Windows)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _replace_file(path, write):
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'w', newline='', encoding='utf-8') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+    _fsync_directory(path)
+
+def _write_csv(f, rows):
+    writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({key: row.get(key, "") for key in FIELDNAMES})
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_FILE):
+        return {"partitions": {}}
+    with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest):
+    _replace_file(MANIFEST_FILE, lambda f: json.dump(manifest, f, indent=2, sort_keys=True))
+
+def load_partition(month):
+    path = partition_file(month)
+    if not os.path.exists(path):
         return []
-    with open(CSV_FILE, 'r', encoding='utf-8') as f:
+    with open(path, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         return list(reader)
 
-def save_reservations(rows):
-    with open(CSV_FILE, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-        writer.writeheader()
+def save_partition(month, rows, manifest):
+    """Atomically rewrite one partition; the caller saves the manifest afterwards."""
+    path = partition_file(month)
+    if rows:
+        _replace_file(path, lambda f: _write_csv(f, rows))
+        manifest["partitions"][month] = {"file": os.path.basename(path), "count": len(rows)}
+    else:
+        if os.path.exists(path):
+            os.remove(path)
+        manifest["partitions"].pop(month, None)
+
+def read_journal():
+    if not os.path.exists(JOURNAL_FILE):
+        return []
+    entries = []
+    with open(JOURNAL_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A torn entry from a failed or interrupted append; appends always
+                # start on a fresh line, so only this line is lost
+                print(f"Ignoring incomplete journal entry in {JOURNAL_FILE}")
+    return entries
+
+def truncate_journal():
+    # Callers hold store_lock(), so no other worker can append meanwhile
+    if os.path.exists(JOURNAL_FILE):
+        with open(JOURNAL_FILE, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+def stored_value(value):
+    # Journal values must read back like CSV cells: text, with missing values as ""
+    return "" if value is None else str(value)
+
+def apply_journal_entry(rows, entry):
+    op = entry.get("op")
+    if op == "insert":
+        row = {key: stored_value(entry["row"].get(key)) for key in FIELDNAMES}
+        for i, existing in enumerate(rows):
+            if existing.get("id") == row["id"]:
+                rows[i] = row
+                break
+        else:
+            rows.append(row)
+    elif op == "update":
+        for row in rows:
+            if row.get("id") == entry["id"]:
+                row.update({key: stored_value(value) for key, value in entry["fields"].items()})
+    elif op == "delete":
+        rows[:] = [row for row in rows if row.get("id") != entry["id"]]
+    return rows
+
+def load_reservations(start=None, end=None, include_undated=False):
+    """Load active reservations with data_pref in [start, end], reading only the partitions that intersect it.
+
+    Rows without a valid data_pref are only returned for an unbounded range or with include_undated.
+    """
+    def wanted(month):
+        return partition_in_range(month, start, end) or (include_undated and month == UNDATED_PARTITION)
+
+    with store_lock():
+        manifest = load_manifest()
+        entries = [entry for entry in read_journal() if wanted(entry["month"])]
+        months = {month for month in manifest["partitions"] if wanted(month)}
+        months.update(entry["month"] for entry in entries)
+        rows = []
+        for month in sorted(months):
+            rows.extend(load_partition(month))
+        for entry in entries:
+            apply_journal_entry(rows, entry)
+        if start is not None or end is not None:
+            rows = [
+                row for row in rows
+                if (include_undated and partition_key(row.get("data_pref")) == UNDATED_PARTITION)
+                or ((start is None or row.get("data_pref", "") >= start)
+                    and (end is None or row.get("data_pref", "") <= end))
+            ]
+        return rows
+
+def compact_journal():
+    """Fold the journal into the partitions it touches and start a new, empty journal."""
+    with store_lock():
+        entries_by_month = {}
+        for entry in read_journal():
+            entries_by_month.setdefault(entry["month"], []).append(entry)
+        manifest = load_manifest()
+        for month, entries in entries_by_month.items():
+            rows = load_partition(month)
+            for entry in entries:
+                apply_journal_entry(rows, entry)
+            save_partition(month, rows, manifest)
+        save_manifest(manifest)
+        truncate_journal()
+
+def append_journal(entries):
+    """Durably append one request's changes with a single fsync."""
+    if not entries:
+        return
+    data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode('utf-8')
+    with store_lock():
+        with open(JOURNAL_FILE, 'a+b', buffering=0) as f:
+            offset = f.seek(0, os.SEEK_END)
+            if offset:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data  # Never continue a torn line
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[f.write(view):]
+                os.fsync(f.fileno())
+            except OSError:
+                # Drop the partial batch so later appends are not written after it
+                f.truncate(offset)
+                raise
+            # Count the shared journal, not this worker's appends, so any worker can compact it
+            f.seek(0)
+            journal_length = f.read().count(b"\n")
+        if journal_length >= JOURNAL_SNAPSHOT_EVERY:
+            compact_journal()
+
+def migrate_legacy_store():
+    """Split the single-file reservations.csv (and its journal) into month partitions."""
+    with store_lock():
+        if os.path.exists(MANIFEST_FILE):
+            return
+        rows = []
+        if os.path.exists(CSV_FILE):
+            with open(CSV_FILE, 'r', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+        entries = read_journal()
+        for entry in entries:
+            apply_journal_entry(rows, entry)
+        if entries:
+            # Fold the untagged journal into the legacy file first so a crash below loses nothing
+            _replace_file(CSV_FILE, lambda f: _write_csv(f, rows))
+            truncate_journal()
+
+        rows_by_month = {}
         for row in rows:
-            normalized = {key: row.get(key, "") for key in FIELDNAMES}
-            writer.writerow(normalized)
+            rows_by_month.setdefault(partition_key(row.get("data_pref")), []).append(row)
+        manifest = {"partitions": {}}
+        for month, month_rows in rows_by_month.items():
+            save_partition(month, month_rows, manifest)
+        save_manifest(manifest)
+        # The legacy file is left in place (it is no longer read once the manifest exists)
+        print(f"Migrated {len(rows)} reservations from {CSV_FILE} into {RESERVATIONS_DIR}")
+
+def recover_reservations():
+    """Fold any journal left over from the previous run into the partitions."""
+    with store_lock():
+        entries = read_journal()
+        if entries or (os.path.exists(JOURNAL_FILE) and os.path.getsize(JOURNAL_FILE)):
+            compact_journal()
+        if entries:
+            print(f"Recovered {len(entries)} journal entries into {RESERVATIONS_DIR}")
+
+def insert_reservation(row):
+    append_journal([{
+        "op": "insert",
+        "month": partition_key(row.get("data_pref")),
+        "row": {key: stored_value(row.get(key)) for key in FIELDNAMES},
+    }])
+
+def update_reservation(row, fields):
+    append_journal([{
+        "op": "update",
+        "month": partition_key(row.get("data_pref")),
+        "id": row["id"],
+        "fields": fields,
+    }])
+
+def archive_expired(start=None, end=None, include_undated=False):
+    """Archive expired reservations in [start, end] and return the ones still active."""
+    with store_lock():
+        rows = load_reservations(start, end, include_undated)
+        remaining, archived = archive_old_reservations(rows)
+        remove_archived(archived)
+        return remaining
+
+_archive_swept_on = None
+
+def sweep_past_months():
+    """Archive expired reservations in the months before the current one, once a day.
+
+    The admin listing only loads the current month onward, so older
+    partitions are cleaned up here instead.
+    """
+    global _archive_swept_on
+    today = datetime.now().date()
+    if _archive_swept_on == today:
+        return
+    _archive_swept_on = today
+    last_month_end = today.replace(day=1) - timedelta(days=1)
+    archive_expired(None, last_month_end.strftime("%Y-%m-%d"), include_undated=True)
+
+def remove_archived(archived):
+    # Archive first: a crash in between leaves a duplicate archive row, never a lost one
+    append_archived(archived)
+    append_journal([
+        {"op": "delete", "month": partition_key(row.get("data_pref")), "id": row["id"]}
+        for row in archived
+    ])
 
 def append_archived(rows):
     if not rows:
@@ -289,6 +622,172 @@ def append_archived(rows):
         for row in rows:
             writer.writerow({key: row.get(key, "") for key in ARCHIVE_FIELDNAMES})
 
+init_db()
+
+# --- RATE LIMITING ---
+
+class MemoryTokenBuckets:
+    def __init__(self):
+        # key -> (tokens, updated, full_at); full buckets are swept out periodically
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def _sweep(self, now):
+        if now - self._last_sweep < RATE_LIMIT_SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= now]:
+            del self._buckets[key]
+
+    def take(self, key, rate, burst):
+        """Take one token; return 0 if allowed, otherwise seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            retry_after = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not retry_after:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return retry_after
+
+    def refund(self, key, rate, burst):
+        """Give back a token taken for a request that was rejected further on."""
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated, _ = self._buckets[key]
+                tokens = min(burst, tokens + 1)
+                self._buckets[key] = (tokens, updated, updated + (burst - tokens) / rate)
+
+class SqliteTokenBuckets:
+    def __init__(self, path):
+        self.path = path
+        self._last_sweep = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL, updated REAL, full_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS token_buckets_full_at ON token_buckets (full_at)")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def take(self, key, rate, burst):
+        now = time.time()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE serializes the read-modify-write across workers
+            conn.execute("BEGIN IMMEDIATE")
+            if now - self._last_sweep >= RATE_LIMIT_SWEEP_INTERVAL:
+                self._last_sweep = now
+                conn.execute("DELETE FROM token_buckets WHERE full_at <= ?", (now,))
+            row = conn.execute("SELECT tokens, updated FROM token_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0, now - updated) * rate)
+            retry_after = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not retry_after:
+                tokens -= 1
+            conn.execute(
+                "INSERT OR REPLACE INTO token_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                (key, tokens, now, now + (burst - tokens) / rate)
+            )
+            conn.execute("COMMIT")
+            return retry_after
+        finally:
+            conn.close()
+
+    def refund(self, key, rate, burst):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE token_buckets SET tokens = MIN(:burst, tokens + 1), "
+                "full_at = updated + (:burst - MIN(:burst, tokens + 1)) / :rate WHERE key = :key",
+                {"key": key, "rate": rate, "burst": burst}
+            )
+        finally:
+            conn.close()
+
+if RATE_LIMIT_BACKEND == "sqlite":
+    rate_buckets = SqliteTokenBuckets(RATE_LIMIT_DB)
+else:
+    rate_buckets = MemoryTokenBuckets()
+
+_admission_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+_admission_lock = threading.Lock()
+_admission_waiting = 0
+
+def acquire_admission():
+    """Wait for a request slot; give up if the queue is full or the wait times out."""
+    global _admission_waiting
+    if _admission_slots.acquire(blocking=False):
+        return True
+    with _admission_lock:
+        if _admission_waiting >= ADMISSION_QUEUE_SIZE:
+            return False
+        _admission_waiting += 1
+    try:
+        return _admission_slots.acquire(timeout=ADMISSION_TIMEOUT)
+    finally:
+        with _admission_lock:
+            _admission_waiting -= 1
+
+def too_many_requests(retry_after):
+    retry_after = max(1, int(retry_after + 0.999))
+    if request.endpoint == 'submit_reservation':
+        response = make_response(render_template(
+            'index.html',
+            msg="Prea multe cereri. Vă rugăm să încercați din nou peste câteva momente."
+        ), 429)
+    else:
+        response = make_response(jsonify({"error": "Too many requests"}), 429)
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+def rate_limited(endpoint):
+    limits = RATE_LIMITS[endpoint]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            client_ip = request.remote_addr or "unknown"
+            buckets = [
+                (f"{endpoint}:ip:{client_ip}",) + limits["ip"],
+                (f"{endpoint}:global",) + limits["global"],
+            ]
+            taken = []
+            retry_after = 0
+            try:
+                for key, rate, burst in buckets:
+                    retry_after = rate_buckets.take(key, rate, burst)
+                    if retry_after:
+                        break
+                    taken.append((key, rate, burst))
+                if not retry_after and not acquire_admission():
+                    retry_after = ADMISSION_TIMEOUT
+            except sqlite3.OperationalError:
+                # The shared bucket store is locked by another worker; shed this request
+                retry_after = 1
+            if retry_after:
+                # Don't charge the client for a request that never ran
+                for key, rate, burst in taken:
+                    try:
+                        rate_buckets.refund(key, rate, burst)
+                    except sqlite3.OperationalError:
+                        pass
+                return too_many_requests(retry_after)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                _admission_slots.release()
+        return wrapper
+    return decorator
+
 # --- ROUTES ---
 
 @app.route('/')
@@ -392,6 +891,7 @@ def admin_reset_form(token):
     return render_template('admin_reset_form.html', token=token)
 
 @app.route('/get_slots')
+@rate_limited('get_slots')
 def get_slots():
     date = request.args.get('date')
     services_param = request.args.get('services', '')
@@ -408,48 +908,45 @@ def get_slots():
     now = datetime.now()
     today_str = now.strftime('%Y-%m-%d')
     
-    if os.path.exists(CSV_FILE):
-        with open(CSV_FILE, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row['data_pref'] == date and row['status'] != 'Respins':
-                    # Calculate duration for this reservation
-                    reservation_duration = 0
-                    
-                    # Check if this reservation has multiple services
-                    reservation_services = row['serviciu'].split(',') if row['serviciu'] else []
-                    
-                    if reservation_services:
-                        services = load_services()
-                        for service_id in reservation_services:
-                            service = next((s for s in services if s['id'] == service_id), None)
-                            if service:
-                                reservation_duration += service['duration']
-                            else:
-                                # Fallback for default services
-                                if service_id == 'tire-change':
-                                    reservation_duration += 60
-                                elif service_id == 'balancing':
-                                    reservation_duration += 30
+    for row in load_reservations(date, date):
+        if row['data_pref'] == date and row['status'] != 'Respins':
+            # Calculate duration for this reservation
+            reservation_duration = 0
+            
+            # Check if this reservation has multiple services
+            reservation_services = row['serviciu'].split(',') if row['serviciu'] else []
+            
+            if reservation_services:
+                services = load_services()
+                for service_id in reservation_services:
+                    service = next((s for s in services if s['id'] == service_id), None)
+                    if service:
+                        reservation_duration += service['duration']
                     else:
-                        # Legacy single service support
-                        services = load_services()
-                        service_duration = 30  # default
-                        for service in services:
-                            if service['id'] == row['serviciu']:
-                                service_duration = service['duration']
-                                break
-                        reservation_duration = service_duration
-                    
-                    # Block slots based on reservation duration
-                    start_time = datetime.strptime(row['ora_pref'], '%H:%M')
-                    end_time = start_time + timedelta(minutes=reservation_duration)
-                    
-                    # Generate all 30-minute slots that this reservation occupies
-                    current_time = start_time
-                    while current_time < end_time:
-                        taken.append(current_time.strftime('%H:%M'))
-                        current_time += timedelta(minutes=30)
+                        # Fallback for default services
+                        if service_id == 'tire-change':
+                            reservation_duration += 60
+                        elif service_id == 'balancing':
+                            reservation_duration += 30
+            else:
+                # Legacy single service support
+                services = load_services()
+                service_duration = 30  # default
+                for service in services:
+                    if service['id'] == row['serviciu']:
+                        service_duration = service['duration']
+                        break
+                reservation_duration = service_duration
+            
+            # Block slots based on reservation duration
+            start_time = datetime.strptime(row['ora_pref'], '%H:%M')
+            end_time = start_time + timedelta(minutes=reservation_duration)
+            
+            # Generate all 30-minute slots that this reservation occupies
+            current_time = start_time
+            while current_time < end_time:
+                taken.append(current_time.strftime('%H:%M'))
+                current_time += timedelta(minutes=30)
     
     # Filter out unavailable time slots based on current time
     available_slots = []
@@ -480,27 +977,29 @@ def get_slots():
         return jsonify(taken)  # Return taken slots (including time-restricted ones)
 
 @app.route('/submit_reservation', methods=['POST'])
+@rate_limited('submit_reservation')
 def submit_reservation():
     # Get form data
     requested_date = request.form.get('date')
     requested_time = request.form.get('time')
     
     # Validate that reservation is not in the past or too soon
-    if requested_date and requested_time:
-        try:
-            reservation_datetime = datetime.strptime(f"{requested_date} {requested_time}", "%Y-%m-%d %H:%M")
-            now = datetime.now()
-            
-            # Don't allow reservations in the past
-            if reservation_datetime <= now:
-                return render_template('index.html', msg="Eroare: Nu puteți face rezervări în trecut!")
+    if not requested_date or not requested_time:
+        return render_template('index.html', msg="Eroare: Selectați data și ora programării!")
+    try:
+        reservation_datetime = datetime.strptime(f"{requested_date} {requested_time}", "%Y-%m-%d %H:%M")
+        now = datetime.now()
+        
+        # Don't allow reservations in the past
+        if reservation_datetime <= now:
+            return render_template('index.html', msg="Eroare: Nu puteți face rezervări în trecut!")
+        
+        # Don't allow reservations within 20 minutes of current time
+        if reservation_datetime <= now + timedelta(minutes=20):
+            return render_template('index.html', msg="Eroare: Rezervările trebuie să fie cu cel puțin 20 de minute în viitor!")
             
-            # Don't allow reservations within 20 minutes of current time
-            if reservation_datetime <= now + timedelta(minutes=20):
-                return render_template('index.html', msg="Eroare: Rezervările trebuie să fie cu cel puțin 20 de minute în viitor!")
-                
-        except ValueError:
-            return render_template('index.html', msg="Eroare: Format de dată/oră invalid!")
+    except ValueError:
+        return render_template('index.html', msg="Eroare: Format de dată/oră invalid!")
     
     # Get selected services
     services_string = request.form.get('services', '')
@@ -522,7 +1021,7 @@ def submit_reservation():
                 total_price += 50
 
     data = {
-        "id": datetime.now().strftime("%Y%m%d%H%M%S"),
+        "id": new_reservation_id(),
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "nume": request.form.get('name'),
         "email": request.form.get('email'),
@@ -537,9 +1036,7 @@ def submit_reservation():
         "pret": total_price,
     }
 
-    with open(CSV_FILE, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
-        writer.writerow(data)
+    insert_reservation(data)
 
     return render_template('index.html', msg="Cerere trimisă! Vă rugăm să așteptați confirmarea pe email.")
 
@@ -548,32 +1045,34 @@ def admin():
     auth_response = admin_login_required()
     if auth_response:
         return auth_response
-    reservations = load_reservations()
-    remaining, archived = archive_old_reservations(reservations)
-    if archived or len(remaining) != len(reservations):
-        save_reservations(remaining)
-        append_archived(archived)
-    reservations = remaining
+    sweep_past_months()
+    reservations = archive_expired(*admin_date_range(), include_undated=True)
     services = load_services()
     
     # Calculate values for JavaScript
     pending_count = sum(1 for res in reservations if res.get('status') == 'In asteptare')
     latest_timestamp = max([res.get('timestamp', '') for res in reservations]) if reservations else ''
     
+    range_from, range_to = admin_date_range()
     return render_template('admin.html',
                            reservations=reservations,
                            services=services,
                            pending_count=pending_count,
-                           latest_timestamp=latest_timestamp)
+                           latest_timestamp=latest_timestamp,
+                           range_from=range_from,
+                           range_to=range_to or '',
+                           range_query=urllib.parse.urlencode(admin_range_args()))
 
 @app.route('/update_status/<id>/<action>')
 def update_status(id, action):
     auth_response = admin_login_required()
     if auth_response:
         return auth_response
-    rows = load_reservations()
+    # The admin links pass the reservation date so only its month is loaded
+    date = request.args.get('date') or None
+    rows = load_reservations(date, date)
     if not rows:
-        return redirect(url_for('admin', token=request.args.get('token')))
+        return redirect(url_for('admin', token=request.args.get('token'), **admin_range_args()))
 
     now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     for row in rows:
@@ -589,11 +1088,11 @@ def update_status(id, action):
                 html = f"Salut {row['nume']}, intervalul nu e disponibil."
                 send_professional_email(row['email'], "Anulare Programare", html)
             row['status_updated'] = now_str
+            update_reservation(row, {"status": row['status'], "status_updated": now_str})
 
     remaining, archived = archive_old_reservations(rows)
-    save_reservations(remaining)
-    append_archived(archived)
-    return redirect(url_for('admin'))
+    remove_archived(archived)
+    return redirect(url_for('admin', **admin_range_args()))
 
 @app.route('/add_manual_reservation', methods=['POST'])
 def add_manual_reservation():
@@ -601,7 +1100,7 @@ def add_manual_reservation():
     if auth_response:
         return auth_response
     data = {
-        "id": datetime.now().strftime("%Y%m%d%H%M%S"),
+        "id": new_reservation_id(),
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "nume": request.form.get('name'),
         "email": "",
@@ -614,10 +1113,8 @@ def add_manual_reservation():
         "status": "Confirmat",
         "status_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
     }
-    rows = load_reservations()
-    rows.append(data)
-    save_reservations(rows)
-    return redirect(url_for('admin'))
+    insert_reservation(data)
+    return redirect(url_for('admin', **admin_range_args()))
 
 @app.route('/api/services', methods=['POST'])
 def api_add_service():
@@ -681,12 +1178,8 @@ def api_reservations_updates():
     if auth_response:
         return auth_response
     
-    reservations = load_reservations()
-    remaining, archived = archive_old_reservations(reservations)
-    if archived or len(remaining) != len(reservations):
-        save_reservations(remaining)
-        append_archived(archived)
-    reservations = remaining
+    sweep_past_months()
+    reservations = archive_expired(*admin_date_range(), include_undated=True)
     
     # Get services for name resolution
     services = load_services()
@@ -184,7 +184,14 @@ document.addEventListener('DOMContentLoaded', () => {
         });
 
         fetch(`/get_slots?date=${selectedDate}&services=${selectedServices.join(',')}&duration=${totalDuration}`)
-            .then(res => res.json())
+            .then(res => {
+                if (!res.ok) {
+                    const error = new Error(`HTTP ${res.status}`);
+                    error.status = res.status;
+                    throw error;
+                }
+                return res.json();
+            })
             .then(slotData => {
                 timeSelect.innerHTML = '<option value="">Selectați Ora</option>';
                 
@@ -218,6 +225,12 @@ document.addEventListener('DOMContentLoaded', () => {
                     
                     timeSelect.appendChild(option);
                 });
+            })
+            .catch(err => {
+                const message = err.status === 429
+                    ? 'Prea multe cereri, reîncercați în câteva secunde'
+                    : 'Nu s-a putut verifica disponibilitatea, reîncercați';
+                timeSelect.innerHTML = `<option value="">${message}</option>`;
             });
     }
 
@@ -0,0 +1,85 @@
+import csv
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    # App runs init_db() on import, so import it away from the repository's data
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("App")
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    monkeypatch.chdir(data_dir)
+    return module
+
+
+def make_row(app_module, name, date):
+    return {
+        "id": app_module.new_reservation_id(),
+        "timestamp": "2099-01-01 10:00:00",
+        "nume": name,
+        "data_pref": date,
+        "ora_pref": "10:00",
+        "status": "In asteptare",
+    }
+
+
+def test_replay_survives_torn_append(app_module):
+    app_module.init_db()
+    app_module.insert_reservation(make_row(app_module, "A", "2099-03-02"))
+    with open(app_module.JOURNAL_FILE, "ab") as f:
+        f.write(b'{"op": "ins')
+    app_module.insert_reservation(make_row(app_module, "B", "2099-03-25"))
+
+    assert [row["nume"] for row in app_module.load_reservations()] == ["A", "B"]
+
+    app_module.compact_journal()
+    assert [row["nume"] for row in app_module.load_partition("2099-03")] == ["A", "B"]
+    assert os.path.getsize(app_module.JOURNAL_FILE) == 0
+
+
+def test_same_second_inserts_keep_both_rows(app_module):
+    app_module.init_db()
+    app_module.insert_reservation(make_row(app_module, "A", "2099-03-02"))
+    app_module.insert_reservation(make_row(app_module, "B", "2099-03-02"))
+
+    assert len(app_module.load_reservations("2099-03-02", "2099-03-02")) == 2
+
+
+def test_migrates_legacy_csv_and_journal(app_module):
+    first = make_row(app_module, "A", "2099-03-02")
+    second = make_row(app_module, "B", "2099-04-10")
+    with open(app_module.CSV_FILE, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=app_module.FIELDNAMES)
+        writer.writeheader()
+        for row in (first, second):
+            writer.writerow({key: row.get(key, "") for key in app_module.FIELDNAMES})
+    # Journal entries written before partitioning carry no month
+    with open(app_module.JOURNAL_FILE, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "update", "id": first["id"], "fields": {"status": "Confirmat"}}) + "\n")
+
+    app_module.init_db()
+
+    manifest = app_module.load_manifest()
+    assert sorted(manifest["partitions"]) == ["2099-03", "2099-04"]
+    march = app_module.load_partition("2099-03")
+    assert [(row["nume"], row["status"]) for row in march] == [("A", "Confirmat")]
+    assert [row["nume"] for row in app_module.load_reservations("2099-04-01", "2099-04-30")] == ["B"]
+    assert os.path.exists(app_module.CSV_FILE)
+
+
+def test_journal_rows_read_back_like_csv_rows(app_module):
+    app_module.init_db()
+    row = make_row(app_module, "A", "2099-03-02")
+    row.update({"serviciu": None, "pret": 150})
+    app_module.insert_reservation(row)
+
+    loaded = app_module.load_reservations()[0]
+    assert (loaded["serviciu"], loaded["pret"]) == ("", "150")